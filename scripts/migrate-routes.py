@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import itertools
 import re
 import sys
 import os
@@ -7,34 +8,71 @@ from pathlib import Path
 import shutil
 from datetime import datetime
 
+# Compiled once at import so per-file processing skips re's cache lookup.
+_OLD_PARAMS_RE = re.compile(r'{\s*params\s*}:\s*{\s*params:\s*Promise<[^>]+>}')
+_AWAIT_PARAMS_RE = re.compile(r'await\s+params')
+
 def process_file(file_path):
-    """Process a single route.ts file for Next.js 15 migration."""
+    """Process a single route.ts file for Next.js 15 migration.
+
+    Returns (original_content, new_content) so the caller can compare
+    without re-reading the file.
+    """
     with open(file_path, 'r') as f:
         content = f.read()
+    original = content
 
-    # Pattern to match the old route handler params
-    old_pattern = r'{\s*params\s*}:\s*{\s*params:\s*Promise<[^>]+>}'
-    
-    # Replace with new format
-    new_content = re.sub(
-        old_pattern,
+    # Each pass only rebuilds the content string when it actually matched,
+    # so files without the pattern keep the original allocation.
+    new_content, n = _OLD_PARAMS_RE.subn(
         lambda m: m.group(0).replace('Promise<', '').replace('>', ''),
         content
     )
-    
+    if n:
+        content = new_content
+
     # Remove await from params access
-    new_content = re.sub(
-        r'await\s+params',
-        'params',
-        new_content
-    )
+    new_content, n = _AWAIT_PARAMS_RE.subn('params', content)
+    if n:
+        content = new_content
 
-    return new_content
+    return original, content
 
-def backup_file(file_path, backup_dir):
-    """Create a backup of the file."""
-    backup_path = Path(backup_dir) / f"{file_path.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    shutil.copy2(file_path, backup_path)
+# Sequence for backup names so one run timestamp keeps them unique.
+_backup_seq = itertools.count()
+
+def _copy_backup(src, dst):
+    """Copy src to dst via os.sendfile where available (no userspace buffer)."""
+    if not hasattr(os, 'sendfile'):
+        shutil.copy2(src, dst)
+        return
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            st = os.fstat(fsrc.fileno())
+            offset = 0
+            while offset < st.st_size:
+                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, st.st_size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    except OSError:
+        shutil.copy2(src, dst)
+
+def backup_file(file_path, backup_dir, run_ts):
+    """Create a backup of the file, stamped with the run timestamp.
+
+    Hardlinks instead of copying when the backup dir is on the same
+    filesystem — zero data movement. Safe because the rewrite goes through
+    a temp file + os.replace, which gives the source a new inode and leaves
+    the link pointing at the original bytes.
+    """
+    backup_path = Path(backup_dir) / f"{file_path.name}_{run_ts}_{next(_backup_seq)}"
+    try:
+        os.link(file_path, backup_path)
+    except OSError:
+        # Cross-device or platform without hardlinks
+        _copy_backup(file_path, backup_path)
     print(f"📑 Backed up: {file_path} -> {backup_path}")
 
 def main():
@@ -46,8 +84,9 @@ def main():
             print("❌ No app directory found!")
             sys.exit(1)
 
-    # Create backup directory
-    backup_dir = Path(f"route_migration_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    # Create backup directory, stamped once for the whole run
+    run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_dir = Path(f"route_migration_backup_{run_ts}")
     backup_dir.mkdir(exist_ok=True)
     print(f"📁 Created backup directory: {backup_dir}")
 
@@ -71,17 +110,26 @@ def main():
     for file_path in route_files:
         try:
             print(f"\n🔄 Processing: {file_path}")
-            
+
+            # Process file first so unchanged files skip the backup and
+            # rewrite entirely
+            old_content, new_content = process_file(file_path)
+
+            if new_content == old_content:
+                success_count += 1
+                print(f"✅ Already migrated, no changes: {file_path}")
+                continue
+
             # Backup original file
-            backup_file(file_path, backup_dir)
-            
-            # Process file
-            new_content = process_file(file_path)
-            
-            # Write changes
-            with open(file_path, 'w') as f:
+            backup_file(file_path, backup_dir, run_ts)
+
+            # Write changes via a staged temp file so the backup hardlink
+            # keeps the original bytes (in-place truncate would clobber them)
+            tmp_path = file_path.with_name(file_path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
                 f.write(new_content)
-            
+            os.replace(tmp_path, file_path)
+
             success_count += 1
             print(f"✅ Successfully migrated: {file_path}")
             